@@ -1,3 +1,2 @@
-from .celery import app as celery_app
-
-__all__ = ('celery_app',)
\ No newline at end of file
+# The Celery app lives in core.celery and is loaded by the worker (`celery -A core`)
+# or on first use, so web processes do not import the Celery stack at startup.
@@ -6,4 +6,12 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 app = Celery('core')
 app.config_from_object('django.conf:settings', namespace='CELERY')
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+# This schedules the task to run every day at 7 AM
+app.conf.beat_schedule = {
+    'send-low-stock-alerts-every-day': {
+        'task': 'inventory.tasks.check_stock_and_send_alerts',
+        'schedule': crontab(hour=7, minute=0),
+    },
+}
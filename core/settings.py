@@ -13,14 +13,15 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from pathlib import Path
 import os
 import dj_database_url
-from dotenv import load_dotenv
-from celery.schedules import crontab
-
-load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Only local development uses a .env file; deployed containers set the environment directly
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
@@ -139,15 +140,23 @@ EMAIL_BACKEND = 'sendgrid_backend.SendgridBackend'
 SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL')
 
+# --- CACHE CONFIGURATION ---
+# Insight snapshots are written by Celery workers and read by web processes,
+# so the cache must be shared between them
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+
 # --- CELERY CONFIGURATION ---
 CELERY_BROKER_URL = os.environ.get('REDIS_URL')
 CELERY_RESULT_BACKEND = os.environ.get('REDIS_URL')
-# This schedules the task to run every day at 7 AM
-CELERY_BEAT_SCHEDULE = {
-    'send-low-stock-alerts-every-day': {
-        'task': 'inventory.tasks.check_stock_and_send_alerts',
-        'schedule': crontab(hour=7, minute=0),
-    },
-}
+# Seconds to wait after an edit before recomputing a user's insights,
+# so a burst of edits triggers a single recompute
+INSIGHTS_RECOMPUTE_DELAY = 5
+# The beat schedule is defined in core/celery.py so web processes do not import Celery
 
 SENDGRID_SANDBOX_MODE_IN_DEBUG = False
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserProfile, Product, Sale, DailyRecord
+from .models import UserProfile, Product, Sale, DailyRecord, AlertState
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -19,4 +19,9 @@ class SaleAdmin(admin.ModelAdmin):
 @admin.register(DailyRecord)
 class DailyRecordAdmin(admin.ModelAdmin):
     list_display = ('user', 'date', 'sales_recorded', 'is_holiday')
-    list_filter = ('user', 'date', 'is_holiday')
\ No newline at end of file
+    list_filter = ('user', 'date', 'is_holiday')
+
+@admin.register(AlertState)
+class AlertStateAdmin(admin.ModelAdmin):
+    list_display = ('product', 'last_status', 'is_dirty', 'updated_at')
+    list_filter = ('last_status', 'is_dirty')
\ No newline at end of file
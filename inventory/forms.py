@@ -15,4 +15,8 @@ class CustomUserCreationForm(UserCreationForm):
 class ProductForm(forms.ModelForm):
     class Meta:
         model = Product
-        fields = ['name', 'quantity', 'reorder_point', 'selling_price']
\ No newline at end of file
+        fields = ['name', 'quantity', 'reorder_point', 'selling_price', 'unit_cost', 'lead_time_days']
+
+class RestockPlanForm(forms.Form):
+    budget = forms.DecimalField(min_value=0, max_digits=12, decimal_places=2, help_text="Total amount available for restocking.")
+    digest = forms.CharField(required=False, widget=forms.HiddenInput)
\ No newline at end of file
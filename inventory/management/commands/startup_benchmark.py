@@ -0,0 +1,88 @@
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Imports what `celery -A core worker` loads before it consumes tasks: the CLI,
+# the worker and consumer bootsteps, the pool, the broker transport and the result
+# backend. Transport and backend objects are created without connecting to the broker.
+WORKER_STARTUP = '''
+import celery.bin.celery
+import celery.events
+import kombu.pidbox
+from billiard import popen_fork, synchronize
+from core.celery import app
+from celery.apps.worker import Worker
+from celery.worker import components
+from celery.worker.consumer import control, events, gossip, mingle
+from celery.concurrency import get_implementation
+app.loader.import_default_modules()
+get_implementation(app.conf.worker_pool)
+app.connection_for_write().transport
+app.backend
+'''
+
+# Each target is started in a fresh interpreter so nothing is already imported
+TARGETS = {
+    'wsgi': ['-c', 'import core.wsgi'],
+    'asgi': ['-c', 'import core.asgi'],
+    'worker': ['-c', WORKER_STARTUP],
+    'manage': ['manage.py', 'check'],
+}
+
+
+def parse_importtime(output):
+    """Return (module, self_us, cumulative_us) tuples from `-X importtime` output."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # Skips the column header line
+            continue
+        modules.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Reports per-module import time for the web, worker and manage.py entry points.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='*', help=f'Entry points to measure: {", ".join(TARGETS)} (default: all).')
+        parser.add_argument('--top', type=int, default=15, help='Number of slowest modules to list per target.')
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative', help='Import time column to rank modules by.')
+
+    def handle(self, *args, **options):
+        unknown = set(options['targets']) - set(TARGETS)
+        if unknown:
+            raise CommandError(f'Unknown targets: {", ".join(sorted(unknown))}. Choose from {", ".join(TARGETS)}.')
+
+        sort_index = 2 if options['sort'] == 'cumulative' else 1
+
+        for target in options['targets'] or TARGETS:
+            started = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime'] + TARGETS[target],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+            )
+            wall_ms = (time.perf_counter() - started) * 1000
+
+            if result.returncode != 0:
+                self.stderr.write(self.style.ERROR(f'{target}: exited with status {result.returncode}'))
+                self.stderr.write(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else '')
+                continue
+
+            modules = parse_importtime(result.stderr)
+            total_ms = sum(module[1] for module in modules) / 1000
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{target}: {len(modules)} modules, {total_ms:.1f} ms importing, {wall_ms:.1f} ms wall time'
+            ))
+            self.stdout.write(f'  {"self [ms]":>10} {"cumul. [ms]":>12}  module')
+            for name, self_us, cumulative_us in sorted(modules, key=lambda module: module[sort_index], reverse=True)[:options['top']]:
+                self.stdout.write(f'  {self_us / 1000:>10.1f} {cumulative_us / 1000:>12.1f}  {name}')
+            self.stdout.write('')
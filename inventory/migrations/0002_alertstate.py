@@ -0,0 +1,34 @@
+# Generated by Django 4.2.25 on 2026-10-19 15:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_alert_states(apps, schema_editor):
+    Product = apps.get_model('inventory', 'Product')
+    AlertState = apps.get_model('inventory', 'AlertState')
+    AlertState.objects.bulk_create(
+        [AlertState(product_id=product_id, is_dirty=True) for product_id in Product.objects.values_list('id', flat=True)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_status', models.CharField(blank=True, help_text='Status included in the last alert check.', max_length=20)),
+                ('is_dirty', models.BooleanField(default=True, help_text="Set when sales or restocks may have changed the product's status.")),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='inventory.product')),
+            ],
+        ),
+        migrations.RunPython(create_alert_states, migrations.RunPython.noop),
+    ]
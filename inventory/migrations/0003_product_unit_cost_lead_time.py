@@ -0,0 +1,23 @@
+# Generated by Django 4.2.25 on 2026-10-19 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_alertstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='lead_time_days',
+            field=models.PositiveIntegerField(default=0, help_text='Days between placing a restock order and receiving it.'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Purchase cost per unit. The selling price is used for restock planning when left blank.', max_digits=10, null=True),
+        ),
+    ]
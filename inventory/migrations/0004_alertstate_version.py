@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-19 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_product_unit_cost_lead_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alertstate',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Incremented every time the product is marked dirty.'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.25 on 2026-10-19 16:11
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_alertstate_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Purchase cost per unit. The selling price is used for restock planning when left blank.', max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+    ]
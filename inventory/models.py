@@ -1,3 +1,4 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -15,6 +16,8 @@ class Product(models.Model):
     quantity = models.PositiveIntegerField(default=0)
     reorder_point = models.PositiveIntegerField(default=10, help_text="Quantity at which a restock alert is triggered.")
     selling_price = models.DecimalField(max_digits=10, decimal_places=2)
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, validators=[MinValueValidator(0)], help_text="Purchase cost per unit. The selling price is used for restock planning when left blank.")
+    lead_time_days = models.PositiveIntegerField(default=0, help_text="Days between placing a restock order and receiving it.")
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -43,4 +46,15 @@ class DailyRecord(models.Model):
 
     def __str__(self):
         status = "Holiday" if self.is_holiday else "Sales Recorded" if self.sales_recorded else "Pending"
-        return f'Record for {self.user.username} on {self.date}: {status}'
\ No newline at end of file
+        return f'Record for {self.user.username} on {self.date}: {status}'
+
+
+class AlertState(models.Model):
+    product = models.OneToOneField(Product, on_delete=models.CASCADE)
+    last_status = models.CharField(max_length=20, blank=True, help_text="Status included in the last alert check.")
+    is_dirty = models.BooleanField(default=True, help_text="Set when sales or restocks may have changed the product's status.")
+    version = models.PositiveIntegerField(default=0, help_text="Incremented every time the product is marked dirty.")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Alert state for {self.product.name}: {self.last_status or "Unchecked"}'
@@ -0,0 +1,132 @@
+import hashlib
+from datetime import timedelta
+from decimal import Decimal
+import numpy as np
+from django.db import transaction
+from django.db.models import Case, When, F, Sum, Value
+from .models import Product, Sale
+from .utils import mark_alert_states_dirty, schedule_insights_recompute
+
+# Products are restocked with one UPDATE per batch to stay under database parameter limits
+APPLY_BATCH_SIZE = 500
+
+
+def build_restock_plan(user, simulated_date, budget):
+    """Choose how many units of each product to restock without exceeding the budget.
+
+    Each product's shortfall is the stock needed to cover 14 days of sales plus its
+    lead time. Every unit is worth its selling price, weighted by how soon the
+    product runs out before a restock could arrive. Shortfalls are filled greedily
+    by value per unit of cost, which is optimal for this per-unit value model
+    apart from the last partially funded product.
+    """
+    end_date = simulated_date
+    start_date = end_date - timedelta(days=14)
+
+    rows = list(Product.objects.filter(owner=user).values_list(
+        'id', 'name', 'quantity', 'selling_price', 'unit_cost', 'lead_time_days'
+    ))
+    sales = dict(Sale.objects.filter(
+        user=user,
+        sale_date__range=[start_date, end_date]
+    ).values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total'))
+
+    budget_paise = int(budget * 100)
+    plan = {
+        'budget': budget,
+        'lines': [],
+        'total_cost': Decimal('0.00'),
+        'remaining_budget': budget,
+        'unfunded_units': 0,
+        'digest': plan_digest([]),
+    }
+    if not rows:
+        return plan
+
+    quantity = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+    price = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+    # Costs are handled in paise so budget checks are exact
+    cost = np.fromiter(
+        (int((row[4] if row[4] is not None else row[3]) * 100) for row in rows),
+        dtype=np.int64, count=len(rows)
+    )
+    lead_time = np.fromiter((row[5] for row in rows), dtype=np.float64, count=len(rows))
+    total_sales = np.fromiter((sales.get(row[0], 0) for row in rows), dtype=np.float64, count=len(rows))
+
+    avg_daily_sales = total_sales / 14.0
+    shortfall = np.maximum(np.round(avg_daily_sales * (14 + lead_time) - quantity), 0).astype(np.int64)
+
+    days_to_stockout = np.divide(quantity, avg_daily_sales, out=np.zeros_like(quantity), where=avg_daily_sales > 0)
+    urgency = 1.0 / (1.0 + np.maximum(days_to_stockout - lead_time, 0))
+    value_density = np.divide(price * urgency, cost, out=np.full_like(price, np.inf), where=cost > 0)
+
+    # Selling price is the fallback cost and is not validated, so negative costs are skipped
+    candidates = np.flatnonzero((shortfall > 0) & (cost >= 0))
+    priority = candidates[np.argsort(-value_density[candidates], kind='stable')]
+
+    planned = np.zeros_like(shortfall)
+    remaining = budget_paise
+    order = priority
+    while order.size:
+        # Fund whole shortfalls in priority order until the next one no longer fits
+        line_cost = np.cumsum(shortfall[order] * cost[order])
+        funded = np.searchsorted(line_cost, remaining, side='right')
+        planned[order[:funded]] = shortfall[order[:funded]]
+        if funded:
+            remaining -= int(line_cost[funded - 1])
+        if funded == order.size:
+            break
+
+        # Partially fund the next product, then retry with the products still affordable
+        partial = order[funded]
+        planned[partial] = remaining // cost[partial]
+        remaining -= int(planned[partial] * cost[partial])
+        order = order[funded + 1:]
+        order = order[cost[order] <= remaining]
+
+    for position in priority[planned[priority] > 0]:
+        row = rows[position]
+        unit_cost = Decimal(int(cost[position])) / 100
+        plan['lines'].append({
+            'product_id': row[0],
+            'name': row[1],
+            'current_quantity': row[2],
+            'recommended_restock': int(shortfall[position]),
+            'quantity': int(planned[position]),
+            'unit_cost': unit_cost,
+            'line_cost': unit_cost * int(planned[position]),
+        })
+
+    plan['total_cost'] = Decimal(budget_paise - remaining) / 100
+    plan['remaining_budget'] = Decimal(remaining) / 100
+    plan['unfunded_units'] = int((shortfall - planned).sum())
+    plan['digest'] = plan_digest(plan['lines'])
+    return plan
+
+
+def plan_digest(lines):
+    """Fingerprint of the planned products and quantities, used to check a previewed plan is still current."""
+    payload = ','.join(f"{line['product_id']}:{line['quantity']}" for line in lines)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def apply_restock_plan(user, plan):
+    """Add every planned quantity to stock in bulk, inside a single transaction."""
+    quantities = [(line['product_id'], line['quantity']) for line in plan['lines']]
+
+    with transaction.atomic():
+        for start in range(0, len(quantities), APPLY_BATCH_SIZE):
+            batch = quantities[start:start + APPLY_BATCH_SIZE]
+            product_ids = [product_id for product_id, _ in batch]
+            Product.objects.filter(owner=user, id__in=product_ids).update(
+                quantity=F('quantity') + Case(
+                    *[When(id=product_id, then=Value(quantity)) for product_id, quantity in batch],
+                    default=Value(0),
+                )
+            )
+            mark_alert_states_dirty(product_ids)
+
+    # Plans larger than SNAPSHOT_PATCH_LIMIT drop the insight snapshots for the
+    # background recompute to rebuild, so applying never rebuilds insights inline
+    schedule_insights_recompute(user, [product_id for product_id, _ in quantities])
+    return len(quantities)
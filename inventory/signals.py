@@ -0,0 +1,9 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Product, AlertState
+
+@receiver(post_save, sender=Product)
+def create_alert_state(sender, instance, created, **kwargs):
+    # New products start dirty so the next alert check evaluates them
+    if created:
+        AlertState.objects.get_or_create(product=instance)
@@ -1,20 +1,38 @@
+from collections import defaultdict
+from datetime import timedelta
 from celery import shared_task
 from django.core.mail import send_mail
 from django.contrib.auth.models import User
-from .models import UserProfile
-from .utils import generate_product_insights
+from .models import UserProfile, AlertState
+from .utils import (
+    generate_product_insights, refresh_insights_snapshot, clear_insights_recompute_pending,
+    create_missing_alert_states, ALERT_STATUSES, ALERT_STATE_BATCH_SIZE,
+)
 
 @shared_task
 def check_stock_and_send_alerts():
-    users = User.objects.all()
+    # Only products touched by sales, restocks or day changes since the last run are evaluated
+    create_missing_alert_states()
+    states_by_owner = defaultdict(list)
+    for state in AlertState.objects.filter(is_dirty=True).select_related('product'):
+        states_by_owner[state.product.owner_id].append(state)
+
+    users = User.objects.filter(id__in=states_by_owner.keys())
 
     for user in users:
         try:
             user_profile = UserProfile.objects.get(user=user)
             simulated_date = user_profile.current_simulated_date
 
-            insights = generate_product_insights(user, simulated_date)
-            alerts = [item for item in insights if item['status'] in ['Critical', 'Low Stock', 'Out of Stock']]
+            states = states_by_owner[user.id]
+            insights = generate_product_insights(user, simulated_date, products=[state.product for state in states])
+
+            # Alert only on transitions into an alert status
+            alerts = []
+            for state, item in zip(states, insights):
+                if item['status'] in ALERT_STATUSES and item['status'] != state.last_status:
+                    alerts.append(item)
+                state.last_status = item['status']
 
             if alerts and user.email:
                 subject = f'Inventory Alert for {simulated_date.strftime("%Y-%m-%d")}'
@@ -33,6 +51,35 @@ def check_stock_and_send_alerts():
                     [user.email],
                     fail_silently=False,
                 )
+
+            AlertState.objects.bulk_update(states, ['last_status'], batch_size=ALERT_STATE_BATCH_SIZE)
+            # States marked dirty again while this check was running have a newer
+            # version and stay dirty for the next run
+            state_ids_by_version = defaultdict(list)
+            for state in states:
+                state_ids_by_version[state.version].append(state.id)
+            for version, state_ids in state_ids_by_version.items():
+                for start in range(0, len(state_ids), ALERT_STATE_BATCH_SIZE):
+                    AlertState.objects.filter(
+                        id__in=state_ids[start:start + ALERT_STATE_BATCH_SIZE],
+                        version=version
+                    ).update(is_dirty=False)
         except UserProfile.DoesNotExist:
             continue
-    return f'Alert check completed for {users.count()} users.'
\ No newline at end of file
+    return f'Alert check completed for {users.count()} users.'
+
+
+@shared_task
+def recompute_product_insights(user_id):
+    clear_insights_recompute_pending(user_id)
+
+    try:
+        user_profile = UserProfile.objects.select_related('user').get(user_id=user_id)
+    except UserProfile.DoesNotExist:
+        return f'No profile found for user {user_id}.'
+
+    simulated_date = user_profile.current_simulated_date
+    insights = refresh_insights_snapshot(user_profile.user, simulated_date)
+    # Tomorrow's snapshot is ready before the user advances the day
+    refresh_insights_snapshot(user_profile.user, simulated_date + timedelta(days=1))
+    return f'Insights recomputed for {len(insights)} products.'
@@ -1,3 +1,434 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from kombu.exceptions import OperationalError
+from .models import UserProfile, Product, Sale, AlertState
+from .management.commands.startup_benchmark import parse_importtime
+from .planning import build_restock_plan, apply_restock_plan
+from .tasks import check_stock_and_send_alerts, recompute_product_insights
+from .utils import (
+    mark_alert_states_dirty, mark_expired_sales_dirty, get_product_insights, generate_product_insights,
+    ALERT_STATE_BATCH_SIZE,
+)
+
+
+class ChangeOnlyAlertTests(TestCase):
+    def setUp(self):
+        self.simulated_date = date(2025, 1, 15)
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        UserProfile.objects.create(user=self.user, current_simulated_date=self.simulated_date)
+
+    def create_product(self, **kwargs):
+        product = Product.objects.create(owner=self.user, selling_price=10, **kwargs)
+        mark_alert_states_dirty([product.id])
+        return product
+
+    def sell(self, product, quantity, sale_date=None):
+        Sale.objects.create(
+            product=product,
+            user=self.user,
+            quantity=quantity,
+            sale_date=sale_date or self.simulated_date,
+            total_price=quantity * product.selling_price
+        )
+
+    def test_product_staying_in_low_stock_is_emailed_once(self):
+        product = self.create_product(name='Widget', quantity=8, reorder_point=10)
+
+        check_stock_and_send_alerts()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Widget: Status is Low Stock', mail.outbox[0].body)
+
+        product.quantity = 7
+        product.save()
+        mark_alert_states_dirty([product.id])
+        check_stock_and_send_alerts()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(AlertState.objects.get(product=product).last_status, 'Low Stock')
+
+    def test_transition_from_healthy_to_critical_is_emailed(self):
+        product = self.create_product(name='Gadget', quantity=100, reorder_point=10)
+        self.sell(product, 14)
+
+        check_stock_and_send_alerts()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(AlertState.objects.get(product=product).last_status, 'Healthy')
+
+        # 140 units over 14 days leaves 20 units, under three days of stock
+        self.sell(product, 126)
+        product.quantity = 20
+        product.save()
+        mark_alert_states_dirty([product.id])
+        check_stock_and_send_alerts()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Gadget: Status is Critical', mail.outbox[0].body)
+
+    def test_clean_products_are_not_evaluated(self):
+        product = self.create_product(name='Widget', quantity=0)
+        check_stock_and_send_alerts()
+        AlertState.objects.filter(product=product).update(last_status='')
+
+        check_stock_and_send_alerts()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(AlertState.objects.get(product=product).last_status, '')
+
+    def test_product_marked_during_check_stays_dirty(self):
+        product = self.create_product(name='Widget', quantity=0)
+
+        # A sale committed while the check is running marks the product again
+        with mock.patch('inventory.tasks.send_mail', side_effect=lambda *args, **kwargs: mark_alert_states_dirty([product.id])):
+            check_stock_and_send_alerts()
+
+        self.assertTrue(AlertState.objects.get(product=product).is_dirty)
+
+    def test_mark_expired_sales_dirty_marks_only_the_day_leaving_the_window(self):
+        dropped = self.create_product(name='Dropped', quantity=50)
+        still_in_window = self.create_product(name='Still in window', quantity=50)
+        already_gone = self.create_product(name='Already gone', quantity=50)
+        AlertState.objects.update(is_dirty=False)
+
+        new_date = self.simulated_date + timedelta(days=1)
+        self.sell(dropped, 1, new_date - timedelta(days=15))
+        self.sell(still_in_window, 1, new_date - timedelta(days=14))
+        self.sell(already_gone, 1, new_date - timedelta(days=16))
+
+        mark_expired_sales_dirty(self.user, new_date)
+
+        dirty = set(AlertState.objects.filter(is_dirty=True).values_list('product__name', flat=True))
+        self.assertEqual(dirty, {'Dropped'})
+
+    def test_products_created_outside_views_get_a_dirty_alert_state(self):
+        product = Product.objects.create(owner=self.user, name='From the shell', quantity=5, selling_price=10)
+
+        self.assertTrue(AlertState.objects.get(product=product).is_dirty)
+
+    def test_bulk_created_products_are_evaluated(self):
+        Product.objects.bulk_create([
+            Product(owner=self.user, name='Imported A', quantity=0, selling_price=10),
+            Product(owner=self.user, name='Imported B', quantity=0, selling_price=10),
+        ])
+
+        check_stock_and_send_alerts()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Imported A: Status is Out of Stock', mail.outbox[0].body)
+        self.assertIn('Imported B: Status is Out of Stock', mail.outbox[0].body)
+        self.assertFalse(AlertState.objects.filter(is_dirty=True).exists())
+
+    def test_more_states_than_one_batch_are_marked_and_cleared(self):
+        count = ALERT_STATE_BATCH_SIZE * 2 + 100
+        Product.objects.bulk_create([
+            Product(owner=self.user, name=f'P{index}', quantity=0, selling_price=10)
+            for index in range(count)
+        ])
+        product_ids = list(Product.objects.values_list('id', flat=True))
+        mark_alert_states_dirty(product_ids)
+        # Marking half again gives the states two different versions
+        mark_alert_states_dirty(product_ids[::2])
+
+        self.assertEqual(AlertState.objects.filter(is_dirty=True).count(), count)
+        check_stock_and_send_alerts()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(AlertState.objects.filter(is_dirty=True).exists())
+
+
+class InsightSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.simulated_date = date(2025, 1, 15)
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        UserProfile.objects.create(user=self.user, current_simulated_date=self.simulated_date)
+        self.product = Product.objects.create(owner=self.user, name='Widget', quantity=0, selling_price=10)
+        self.client.force_login(self.user)
+
+    def restock(self, quantity=50):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('update_stock', args=[self.product.id]), {'quantity_to_add': quantity})
+
+    def statuses(self):
+        response = self.client.get(reverse('predictions'))
+        return [item['status'] for item in response.context['insights']]
+
+    @mock.patch('celery.app.task.Task.apply_async')
+    def test_restock_is_visible_before_the_recompute_runs(self, apply_async):
+        self.assertEqual(self.statuses(), ['Out of Stock'])
+
+        self.restock()
+
+        apply_async.assert_called_once_with(args=[self.user.id], countdown=mock.ANY)
+        self.assertEqual(self.statuses(), ['Inactive'])
+
+    @mock.patch('celery.app.task.Task.apply_async')
+    def test_burst_of_edits_queues_one_recompute(self, apply_async):
+        self.restock()
+        self.restock()
+
+        self.assertEqual(apply_async.call_count, 1)
+
+    @mock.patch('celery.app.task.Task.apply_async')
+    def test_advanced_day_is_served_from_prefetched_snapshot(self, apply_async):
+        recompute_product_insights(self.user.id)
+        self.client.get(reverse('advance_day'))
+
+        with mock.patch('inventory.utils.generate_product_insights') as generate:
+            response = self.client.get(reverse('dashboard'))
+
+        generate.assert_not_called()
+        self.assertEqual(response.context['alerts'][0]['status'], 'Out of Stock')
+
+    @mock.patch('celery.app.task.Task.apply_async', side_effect=OperationalError('broker down'))
+    def test_writes_succeed_when_broker_is_down(self, apply_async):
+        get_product_insights(self.user, self.simulated_date)
+
+        with self.assertLogs('inventory.utils', level='ERROR'):
+            response = self.restock()
+
+        self.assertRedirects(response, reverse('dashboard'))
+        self.assertEqual(Product.objects.get(id=self.product.id).quantity, 50)
+        self.assertIsNone(cache.get(f'inventory:insights-pending:{self.user.id}'))
+        self.assertEqual(self.statuses(), ['Inactive'])
+
+    def test_writes_and_reads_succeed_when_cache_is_down(self):
+        broken_cache = mock.Mock()
+        for method in ('get', 'set', 'add', 'delete'):
+            getattr(broken_cache, method).side_effect = ConnectionError('cache down')
+
+        with mock.patch('inventory.utils.cache', broken_cache), self.assertLogs('inventory.utils', level='ERROR'):
+            response = self.restock()
+            self.assertRedirects(response, reverse('dashboard'))
+            self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+            self.assertEqual(self.statuses(), ['Inactive'])
+
+    @mock.patch('celery.app.task.Task.apply_async')
+    @mock.patch('inventory.utils.SNAPSHOT_PATCH_LIMIT', 0)
+    def test_bulk_edit_drops_snapshots_instead_of_rebuilding_them(self, apply_async):
+        recompute_product_insights(self.user.id)
+
+        with mock.patch('inventory.utils.generate_product_insights') as generate:
+            self.restock()
+
+        generate.assert_not_called()
+        apply_async.assert_called_once()
+        for snapshot_date in (self.simulated_date, self.simulated_date + timedelta(days=1)):
+            self.assertIsNone(cache.get(f'inventory:insights:{self.user.id}:{snapshot_date.isoformat()}'))
+        self.assertEqual(self.statuses(), ['Inactive'])
+
+    def test_insights_for_a_few_products_only_aggregate_their_sales(self):
+        with CaptureQueriesContext(connection) as queries:
+            generate_product_insights(self.user, self.simulated_date, products=[self.product])
+
+        sales_query = next(query['sql'] for query in queries if 'inventory_sale' in query['sql'])
+        self.assertIn(f'"inventory_sale"."product_id" IN ({self.product.id})', sales_query)
+
+
+class RestockPlannerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.simulated_date = date(2025, 1, 15)
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        UserProfile.objects.create(user=self.user, current_simulated_date=self.simulated_date)
+
+    def create_product(self, name, quantity=0, daily_sales=1, owner=None, **kwargs):
+        owner = owner or self.user
+        kwargs.setdefault('selling_price', 10)
+        product = Product.objects.create(owner=owner, name=name, quantity=quantity, **kwargs)
+        if daily_sales:
+            Sale.objects.create(
+                product=product,
+                user=owner,
+                quantity=daily_sales * 14,
+                sale_date=self.simulated_date,
+                total_price=0
+            )
+        return product
+
+    def plan(self, budget):
+        return build_restock_plan(self.user, self.simulated_date, Decimal(budget))
+
+    def planned_quantities(self, plan):
+        return {line['name']: line['quantity'] for line in plan['lines']}
+
+    def test_everything_fits_within_budget(self):
+        self.create_product('A', unit_cost=2)
+        self.create_product('B', unit_cost=3)
+
+        plan = self.plan('100')
+
+        self.assertEqual(self.planned_quantities(plan), {'A': 14, 'B': 14})
+        self.assertEqual(plan['total_cost'], Decimal('70'))
+        self.assertEqual(plan['remaining_budget'], Decimal('30'))
+        self.assertEqual(plan['unfunded_units'], 0)
+
+    def test_nothing_fits_within_budget(self):
+        self.create_product('A', unit_cost=5)
+
+        plan = self.plan('4.99')
+
+        self.assertEqual(plan['lines'], [])
+        self.assertEqual(plan['total_cost'], Decimal('0'))
+        self.assertEqual(plan['unfunded_units'], 14)
+
+    def test_partial_fit_funds_higher_value_products_first(self):
+        self.create_product('Cheap', unit_cost=1)
+        self.create_product('Dear', unit_cost=5)
+        self.create_product('Also cheap', unit_cost=1, selling_price=5)
+
+        plan = self.plan('40')
+
+        # Cheap (10/unit) fills first, then Also cheap (5/unit), then what is left of Dear (2/unit)
+        self.assertEqual(self.planned_quantities(plan), {'Cheap': 14, 'Also cheap': 14, 'Dear': 2})
+        self.assertEqual(plan['total_cost'], Decimal('38'))
+        self.assertEqual(plan['unfunded_units'], 12)
+
+    def test_leftover_budget_is_spent_on_cheaper_lower_priority_products(self):
+        self.create_product('Dear', unit_cost=30, selling_price=1000)
+        self.create_product('Cheap', unit_cost=1, selling_price=1)
+
+        plan = self.plan('50')
+
+        self.assertEqual(self.planned_quantities(plan), {'Dear': 1, 'Cheap': 14})
+        self.assertEqual(plan['total_cost'], Decimal('44'))
+
+    def test_budget_is_never_exceeded(self):
+        for index in range(40):
+            self.create_product(
+                f'P{index}',
+                quantity=index % 7,
+                daily_sales=index % 5 + 1,
+                selling_price=index % 9 + 1,
+                unit_cost=Decimal(index % 11 + 1) / 3,
+                lead_time_days=index % 4,
+            )
+
+        for budget in ('0', '1', '17.35', '250', '999.99', '5000'):
+            plan = self.plan(budget)
+            line_total = sum(line['line_cost'] for line in plan['lines'])
+            self.assertLessEqual(plan['total_cost'], Decimal(budget))
+            self.assertEqual(plan['total_cost'], line_total)
+            self.assertTrue(all(0 < line['quantity'] <= line['recommended_restock'] for line in plan['lines']))
+
+    def test_zero_cost_products_are_always_funded(self):
+        self.create_product('Free', unit_cost=0)
+        self.create_product('Paid', unit_cost=1)
+
+        plan = self.plan('0')
+
+        self.assertEqual(self.planned_quantities(plan), {'Free': 14})
+        self.assertEqual(plan['total_cost'], Decimal('0'))
+
+    def test_negative_cost_products_are_skipped(self):
+        self.create_product('Negative', selling_price=-5)
+        self.create_product('Normal', unit_cost=1)
+
+        plan = self.plan('10')
+
+        self.assertEqual(self.planned_quantities(plan), {'Normal': 10})
+        self.assertEqual(plan['total_cost'], Decimal('10'))
+
+    def test_unit_cost_cannot_be_negative(self):
+        product = self.create_product('A', unit_cost=-1)
+
+        with self.assertRaises(ValidationError):
+            product.full_clean()
+
+    def test_lead_time_raises_shortfall(self):
+        self.create_product('No lead time', unit_cost=1)
+        self.create_product('Slow supplier', unit_cost=1, lead_time_days=7)
+
+        plan = self.plan('1000')
+
+        self.assertEqual(self.planned_quantities(plan), {'No lead time': 14, 'Slow supplier': 21})
+
+    @mock.patch('inventory.planning.APPLY_BATCH_SIZE', 3)
+    def test_apply_updates_only_the_tenants_products_across_batches(self):
+        products = [self.create_product(f'P{index}', quantity=index, unit_cost=1) for index in range(7)]
+        other_user = User.objects.create_user('other', 'other@example.com', 'password')
+        other_product = self.create_product('Other', quantity=5, owner=other_user, unit_cost=1)
+
+        plan = self.plan('1000')
+        plan['lines'].append({'product_id': other_product.id, 'quantity': 100})
+
+        apply_restock_plan(self.user, plan)
+
+        for product in products:
+            product.refresh_from_db()
+            self.assertEqual(product.quantity, 14)
+        other_product.refresh_from_db()
+        self.assertEqual(other_product.quantity, 5)
+        self.assertEqual(AlertState.objects.filter(product__owner=self.user, is_dirty=True).count(), 7)
+
+    @mock.patch('celery.app.task.Task.apply_async')
+    @mock.patch('inventory.utils.SNAPSHOT_PATCH_LIMIT', 3)
+    def test_large_apply_drops_snapshots_instead_of_rebuilding_insights(self, apply_async):
+        for index in range(5):
+            self.create_product(f'P{index}', unit_cost=1)
+        recompute_product_insights(self.user.id)
+        plan = self.plan('1000')
+
+        with mock.patch('inventory.utils.generate_product_insights') as generate:
+            with self.captureOnCommitCallbacks(execute=True):
+                apply_restock_plan(self.user, plan)
+
+        generate.assert_not_called()
+        apply_async.assert_called_once()
+        self.assertIsNone(cache.get(f'inventory:insights:{self.user.id}:{self.simulated_date.isoformat()}'))
+
+    def test_apply_rejects_a_plan_that_changed_since_preview(self):
+        product = self.create_product('A', unit_cost=1)
+        self.client.force_login(self.user)
+        preview = self.client.get(reverse('restock_plan'), {'budget': '100'}).context['plan']
+
+        Product.objects.filter(id=product.id).update(quantity=4)
+        response = self.client.post(reverse('restock_plan'), {'budget': '100', 'digest': preview['digest']})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Product.objects.get(id=product.id).quantity, 4)
+        self.assertEqual(response.context['plan']['lines'][0]['quantity'], 10)
+
+    @mock.patch('celery.app.task.Task.apply_async')
+    def test_apply_accepts_the_previewed_plan(self, apply_async):
+        product = self.create_product('A', unit_cost=1)
+        self.client.force_login(self.user)
+        preview = self.client.get(reverse('restock_plan'), {'budget': '100'}).context['plan']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('restock_plan'), {'budget': '100', 'digest': preview['digest']})
+
+        self.assertRedirects(response, reverse('dashboard'))
+        self.assertEqual(Product.objects.get(id=product.id).quantity, 14)
+
+
+class StartupBenchmarkTests(TestCase):
+    def test_parse_importtime(self):
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |     django.utils.version\n'
+            'import time:      2041 |       2161 |   django.utils\n'
+            'import time:       880 |       3041 | django\n'
+            'Some other stderr output\n'
+        )
+
+        self.assertEqual(parse_importtime(output), [
+            ('django.utils.version', 120, 120),
+            ('django.utils', 2041, 2161),
+            ('django', 880, 3041),
+        ])
+
+    def test_unknown_target_is_rejected(self):
+        with self.assertRaisesMessage(CommandError, 'Unknown targets: bogus'):
+            call_command('startup_benchmark', 'bogus')
 
-# Create your tests here.
@@ -12,4 +12,5 @@ urlpatterns = [
     path('visualizations/', views.visualizations, name='visualizations'),
     path('predictions/', views.predictions, name='predictions'),
     path('update_stock/<int:product_id>/', views.update_stock, name='update_stock'),
+    path('restock_plan/', views.restock_plan, name='restock_plan'),
 ]
\ No newline at end of file
@@ -1,21 +1,46 @@
+import logging
 from datetime import timedelta
-from django.db.models import Avg
-from .models import Product, Sale
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, F, Sum
+from django.utils import timezone
+from .models import UserProfile, Product, Sale, AlertState
 
-def generate_product_insights(user, simulated_date):
-    products = Product.objects.filter(owner=user)
+logger = logging.getLogger(__name__)
+
+ALERT_STATUSES = ['Critical', 'Low Stock', 'Out of Stock']
+
+# Alert state writes are batched to stay under database parameter limits
+ALERT_STATE_BATCH_SIZE = 500
+
+# Snapshots are keyed by simulated date, so old ones can simply expire
+INSIGHTS_SNAPSHOT_TIMEOUT = 60 * 60 * 48
+# Edits touching more products than this drop the snapshots for the background task to rebuild
+SNAPSHOT_PATCH_LIMIT = 500
+
+def generate_product_insights(user, simulated_date, products=None):
     insights = []
     
     end_date = simulated_date
     start_date = end_date - timedelta(days=14)
 
+    # One grouped query for every product's sales in the window
+    sales = Sale.objects.filter(
+        product__owner=user,
+        sale_date__range=[start_date, end_date]
+    )
+    if products is None:
+        products = Product.objects.filter(owner=user)
+    else:
+        products = list(products)
+        if len(products) <= SNAPSHOT_PATCH_LIMIT:
+            # Small subsets, such as a single edited product, only aggregate their own sales
+            sales = sales.filter(product_id__in=[product.id for product in products])
+    sales_totals = dict(sales.values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total'))
+
     for product in products:
-        sales_data = Sale.objects.filter(
-            product=product,
-            sale_date__range=[start_date, end_date]
-        )
-        
-        total_sales = sum(sale.quantity for sale in sales_data)
+        total_sales = sales_totals.get(product.id, 0)
         avg_daily_sales = total_sales / 14.0 if total_sales > 0 else 0
         
         days_to_stockout = 0
@@ -56,4 +81,143 @@ def generate_product_insights(user, simulated_date):
             'recommended_restock': recommended_restock,
         })
         
-    return insights
\ No newline at end of file
+    return insights
+
+
+def mark_alert_states_dirty(product_ids):
+    """Flag products for re-evaluation by the nightly alert check."""
+    product_ids = list(product_ids)
+    for start in range(0, len(product_ids), ALERT_STATE_BATCH_SIZE):
+        batch = product_ids[start:start + ALERT_STATE_BATCH_SIZE]
+        # Bumping the version tells an alert check already in progress that it saw stale data
+        AlertState.objects.filter(product_id__in=batch).update(
+            is_dirty=True,
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+        )
+        # Products created without their alert state get a fresh, dirty row
+        AlertState.objects.bulk_create(
+            [AlertState(product_id=product_id, is_dirty=True) for product_id in batch],
+            ignore_conflicts=True,
+        )
+
+
+def create_missing_alert_states():
+    """Give products created without a post_save signal, e.g. through bulk_create, a dirty alert state."""
+    product_ids = list(Product.objects.filter(alertstate__isnull=True).values_list('id', flat=True))
+    for start in range(0, len(product_ids), ALERT_STATE_BATCH_SIZE):
+        AlertState.objects.bulk_create(
+            [AlertState(product_id=product_id, is_dirty=True) for product_id in product_ids[start:start + ALERT_STATE_BATCH_SIZE]],
+            ignore_conflicts=True,
+        )
+
+
+def mark_expired_sales_dirty(user, simulated_date):
+    """Flag products whose sales just dropped out of the 14-day insight window."""
+    expired_date = simulated_date - timedelta(days=15)
+    product_ids = Sale.objects.filter(
+        user=user,
+        sale_date=expired_date
+    ).values_list('product_id', flat=True).distinct()
+    mark_alert_states_dirty(product_ids)
+
+
+def _insights_cache_key(user_id, simulated_date):
+    return f'inventory:insights:{user_id}:{simulated_date.isoformat()}'
+
+
+def _recompute_pending_key(user_id):
+    return f'inventory:insights-pending:{user_id}'
+
+
+def _serialize_insights(insights):
+    return {
+        item['product'].id: {key: value for key, value in item.items() if key != 'product'}
+        for item in insights
+    }
+
+
+def refresh_insights_snapshot(user, simulated_date):
+    """Compute the user's insights and store them for views to read."""
+    insights = generate_product_insights(user, simulated_date)
+    try:
+        cache.set(_insights_cache_key(user.id, simulated_date), _serialize_insights(insights), INSIGHTS_SNAPSHOT_TIMEOUT)
+    except Exception:
+        logger.exception('Could not store insights for user %s', user.id)
+    return insights
+
+
+def get_product_insights(user, simulated_date):
+    """Return insights from the stored snapshot, computing them only if it is missing or the cache is unavailable."""
+    try:
+        snapshot = cache.get(_insights_cache_key(user.id, simulated_date))
+    except Exception:
+        logger.exception('Could not read insights for user %s', user.id)
+        return generate_product_insights(user, simulated_date)
+
+    products = Product.objects.filter(owner=user).in_bulk()
+    if snapshot is None or set(snapshot) != set(products):
+        return refresh_insights_snapshot(user, simulated_date)
+
+    return [dict(item, product=products[product_id]) for product_id, item in snapshot.items()]
+
+
+def _patch_insights_snapshots(user, product_ids):
+    """Recompute the edited products in today's and tomorrow's snapshots so the next read sees the write."""
+    simulated_date = UserProfile.objects.filter(user=user).values_list('current_simulated_date', flat=True).first()
+    if simulated_date is None:
+        return
+
+    snapshot_dates = (simulated_date, simulated_date + timedelta(days=1))
+    if len(product_ids) > SNAPSHOT_PATCH_LIMIT:
+        # Bulk edits drop the snapshots instead of rebuilding them inside the request;
+        # the queued recompute rebuilds them
+        cache.delete_many([_insights_cache_key(user.id, snapshot_date) for snapshot_date in snapshot_dates])
+        return
+
+    products = list(Product.objects.filter(owner=user, id__in=product_ids))
+    for snapshot_date in snapshot_dates:
+        key = _insights_cache_key(user.id, snapshot_date)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            continue
+        snapshot.update(_serialize_insights(generate_product_insights(user, snapshot_date, products=products)))
+        cache.set(key, snapshot, INSIGHTS_SNAPSHOT_TIMEOUT)
+
+
+def schedule_insights_recompute(user, product_ids=()):
+    """Refresh the edited products' insights and queue a background recompute, one per burst of edits."""
+    delay = settings.INSIGHTS_RECOMPUTE_DELAY
+    product_ids = list(product_ids)
+
+    def refresh():
+        pending_key = _recompute_pending_key(user.id)
+        try:
+            if product_ids:
+                _patch_insights_snapshots(user, product_ids)
+            # Only the first edit in a burst enqueues; the task clears the flag when it starts
+            queued = cache.add(pending_key, True, timeout=delay + 60)
+        except Exception:
+            # Reads fall back to computing insights themselves while the cache is unavailable
+            logger.exception('Could not update insights for user %s', user.id)
+            return
+        if not queued:
+            return
+
+        # Celery is only loaded once a web process actually enqueues work
+        import core.celery  # noqa: F401
+        from .tasks import recompute_product_insights
+        try:
+            recompute_product_insights.apply_async(args=[user.id], countdown=delay)
+        except Exception:
+            logger.exception('Could not queue an insight recompute for user %s', user.id)
+            clear_insights_recompute_pending(user.id)
+
+    transaction.on_commit(refresh)
+
+
+def clear_insights_recompute_pending(user_id):
+    try:
+        cache.delete(_recompute_pending_key(user_id))
+    except Exception:
+        logger.exception('Could not clear the insight recompute flag for user %s', user_id)
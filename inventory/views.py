@@ -3,14 +3,14 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from datetime import timedelta
-from .forms import CustomUserCreationForm, ProductForm
+from .forms import CustomUserCreationForm, ProductForm, RestockPlanForm
 from .models import UserProfile, Product, Sale, DailyRecord
 from django.contrib.auth import login
 from django.db import transaction
 import json
 from django.db.models import Sum, F
 from django.db.models.functions import TruncDay
-from .utils import generate_product_insights
+from .utils import get_product_insights, schedule_insights_recompute, mark_alert_states_dirty, mark_expired_sales_dirty, ALERT_STATUSES
 
 def home(request):
     return render(request, 'inventory/home.html')
@@ -37,8 +37,8 @@ def dashboard(request):
     user_profile = get_object_or_404(UserProfile, user=request.user)
     simulated_date = user_profile.current_simulated_date
 
-    insights = generate_product_insights(request.user, simulated_date)
-    alerts = [item for item in insights if item['status'] in ['Critical', 'Low Stock', 'Out of Stock']]
+    insights = get_product_insights(request.user, simulated_date)
+    alerts = [item for item in insights if item['status'] in ALERT_STATUSES]
 
     sales_recorded_today = DailyRecord.objects.filter(
         user=request.user, 
@@ -62,6 +62,7 @@ def add_product(request):
             product = form.save(commit=False)
             product.owner = request.user
             product.save()
+            schedule_insights_recompute(request.user, [product.id])
             messages.success(request, f'Product "{product.name}" has been added successfully.')
             return redirect('dashboard')
     else:
@@ -85,6 +86,7 @@ def record_sales(request):
 
         # Using a transaction to ensure all or no database operations are completed
         with transaction.atomic():
+            sold_product_ids = []
             for key, value in request.POST.items():
                 if key.startswith('quantity_'):
                     try:
@@ -105,6 +107,7 @@ def record_sales(request):
                                     sale_date=simulated_date,
                                     total_price=quantity_sold * product.selling_price
                                 )
+                                sold_product_ids.append(product.id)
                             else:
                                 messages.error(request, f'Not enough stock for {product.name}. Sale not recorded.')
                                 # This will roll back the transaction
@@ -116,6 +119,8 @@ def record_sales(request):
 
             # Marking the day's sales as recorded
             DailyRecord.objects.create(user=request.user, date=simulated_date, sales_recorded=True)
+            mark_alert_states_dirty(sold_product_ids)
+            schedule_insights_recompute(request.user, sold_product_ids)
         
         messages.success(request, f'Sales for {simulated_date.strftime("%Y-%m-%d")} recorded successfully.')
         return redirect('dashboard')
@@ -134,6 +139,8 @@ def advance_day(request):
     user_profile = get_object_or_404(UserProfile, user=request.user)
     user_profile.current_simulated_date += timedelta(days=1)
     user_profile.save()
+    mark_expired_sales_dirty(request.user, user_profile.current_simulated_date)
+    schedule_insights_recompute(request.user)
     messages.info(request, f'Time advanced to {user_profile.current_simulated_date.strftime("%Y-%m-%d")}.')
     return redirect('dashboard')
 
@@ -146,6 +153,8 @@ def mark_as_holiday(request):
     
     user_profile.current_simulated_date += timedelta(days=1)
     user_profile.save()
+    mark_expired_sales_dirty(request.user, user_profile.current_simulated_date)
+    schedule_insights_recompute(request.user)
     
     messages.warning(request, f'{simulated_date.strftime("%Y-%m-%d")} was marked as a holiday. Time advanced to the next day.')
     return redirect('dashboard')
@@ -200,7 +209,7 @@ def predictions(request):
     user_profile = get_object_or_404(UserProfile, user=request.user)
     simulated_date = user_profile.current_simulated_date
 
-    insights = generate_product_insights(request.user, simulated_date)
+    insights = get_product_insights(request.user, simulated_date)
     
     context = {
         'insights': insights
@@ -219,6 +228,8 @@ def update_stock(request, product_id):
             if quantity_to_add > 0:
                 product.quantity += quantity_to_add
                 product.save()
+                mark_alert_states_dirty([product.id])
+                schedule_insights_recompute(request.user, [product.id])
                 messages.success(request, f'Successfully added {quantity_to_add} units to {product.name}.')
             else:
                 messages.warning(request, 'Please enter a positive quantity to add.')
@@ -226,4 +237,37 @@ def update_stock(request, product_id):
         except ValueError:
             messages.error(request, 'Invalid quantity entered. Please enter a number.')
             
-    return redirect('dashboard')
\ No newline at end of file
+    return redirect('dashboard')
+
+
+# Number of plan lines rendered; larger plans are still applied in full
+RESTOCK_PLAN_DISPLAY_LIMIT = 200
+
+@login_required
+def restock_plan(request):
+    # The planner pulls in numpy, so it is only imported when this page is used
+    from .planning import build_restock_plan, apply_restock_plan
+
+    user_profile = get_object_or_404(UserProfile, user=request.user)
+    simulated_date = user_profile.current_simulated_date
+
+    form = RestockPlanForm(request.POST if request.method == 'POST' else request.GET or None)
+    plan = None
+
+    if form.is_valid():
+        plan = build_restock_plan(request.user, simulated_date, form.cleaned_data['budget'])
+
+        if request.method == 'POST' and form.cleaned_data['digest'] != plan['digest']:
+            messages.error(request, 'Stock or sales changed since this plan was previewed. Review the updated plan and apply it again.')
+        elif request.method == 'POST':
+            restocked_count = apply_restock_plan(request.user, plan)
+            messages.success(request, f'Restocked {restocked_count} products for ₹{plan["total_cost"]:.2f}.')
+            return redirect('dashboard')
+
+    context = {
+        'form': form,
+        'plan': plan,
+        'plan_lines': plan['lines'][:RESTOCK_PLAN_DISPLAY_LIMIT] if plan else [],
+        'simulated_date': simulated_date,
+    }
+    return render(request, 'inventory/restock_plan.html', context)